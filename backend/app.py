@@ -2,17 +2,25 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from functools import lru_cache
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from typing import Dict, Literal, Optional
 
+import numpy as np
 import pandas as pd
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 
 from .config import settings
-from .model_loader import generate_text, load_llm
-from .rag_pipeline import RAGPipeline
+from .model_loader import (
+    encode_prompt_prefix,
+    generate_batch,
+    generate_text,
+    load_llm,
+)
+from .rag_pipeline import STOCK_COLUMNS, RAGPipeline, read_csv_fast
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +35,20 @@ app.add_middleware(
 model = None
 tokenizer = None
 rag_pipeline: RAGPipeline | None = None
+prompt_prefix_ids: list[int] | None = None
+# Pending (prompt, future) pairs consumed by the micro-batching worker
+generation_queue: asyncio.Queue[tuple[str, asyncio.Future]] | None = None
+batch_worker_task: asyncio.Task | None = None
+# Single worker serializes GPU work; CPU-bound helpers get one thread per core.
+generation_pool: ThreadPoolExecutor | None = None
+cpu_pool: ThreadPoolExecutor | None = None
+
+SYSTEM_ROLE = (
+    "You are FinGPT, a professional financial analyst. "
+    "Always answer in concise, formal English."
+)
+# Static head of every prompt; tokenized once at startup.
+PROMPT_PREFIX = f"{SYSTEM_ROLE}\n"
 
 
 class AnalyzeRequest(BaseModel):
@@ -46,48 +68,164 @@ class AnalyzeResponse(BaseModel):
 @lru_cache(maxsize=1)
 def _market_overview() -> list[dict]:
     """Compute a simple market overview from the local stocks.csv file."""
-    if not settings.stocks_file.exists():
-        return []
-        
-    df = pd.read_csv(settings.stocks_file)
-    if df.empty:
+    if rag_pipeline is not None:
+        df = rag_pipeline.stocks_frame
+    elif settings.stocks_file.exists():
+        df = read_csv_fast(settings.stocks_file, STOCK_COLUMNS)
+    else:
+        df = None
+    if df is None or df.empty:
         return []
 
-    rows: list[dict] = []
-    for symbol, group in df.groupby("symbol"):
-        group = group.sort_values("date")
-        last = group.iloc[-1]
-        prev = group.iloc[-2] if len(group) > 1 else None
+    df = df.sort_values(["symbol", "date"])
+    grouped = df.groupby("symbol", sort=False)
+    last = grouped.tail(1).set_index("symbol")
+    prev = grouped.nth(-2).set_index("symbol")
 
-        last_close = float(last["close"])
-        prev_close = float(prev["close"]) if prev is not None else None
-        pct_change = (
-            (last_close - prev_close) / prev_close * 100 if prev_close else None
+    overview = pd.DataFrame(
+        {
+            "date": last["date"].astype(str),
+            "last_close": last["close"].astype(float),
+            "prev_close": prev["close"].astype(float).reindex(last.index),
+        }
+    )
+    last_close = overview["last_close"].to_numpy()
+    prev_close = overview["prev_close"].to_numpy()
+    # Symbols with a single candle (NaN) or a zero previous close get no change.
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overview["pct_change"] = np.where(
+            prev_close != 0, (last_close - prev_close) / prev_close * 100, np.nan
         )
 
-        rows.append(
-            {
-                "symbol": symbol,
-                "date": str(last["date"]),
-                "last_close": last_close,
-                "prev_close": prev_close,
-                "pct_change": pct_change,
-            }
-        )
-    return rows
+    overview = overview.astype(object).where(overview.notna(), None)
+    return overview.rename_axis("symbol").reset_index().to_dict(orient="records")
+
+
+def _format_block(item: dict) -> str:
+    return f"[{item.get('source', 'data')} - {item.get('id')}] {item.get('snippet')}"
+
+
+def _format_context(retrieved: list[dict]) -> str:
+    """Render retrieved payloads as the prompt's context section."""
+    if not retrieved:
+        # Even if no context is found, we still let the model try to answer
+        # based on its internal knowledge or state it doesn't know.
+        return "No specific internal documents found."
+    return "\n\n".join(map(_format_block, retrieved))
+
+
+async def _batch_worker() -> None:
+    """Group queued prompts into micro-batches and run each as one generate call."""
+    loop = asyncio.get_running_loop()
+    max_wait = settings.batch_wait_ms / 1000
+    while True:
+        batch = [await generation_queue.get()]
+        deadline = loop.time() + max_wait
+        while len(batch) < settings.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(generation_queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        prompts = [prompt for prompt, _ in batch]
+        try:
+            results = await loop.run_in_executor(
+                generation_pool,
+                generate_batch,
+                model,
+                tokenizer,
+                prompts,
+                settings,
+                prompt_prefix_ids,
+            )
+        except Exception as exc:
+            if len(batch) == 1:
+                logger.exception("Generation failed.")
+                if not batch[0][1].done():
+                    batch[0][1].set_exception(exc)
+                continue
+            # One bad prompt must not fail the requests batched with it: retry
+            # each prompt on its own and only fail those that still raise.
+            logger.exception(
+                "Batched generation failed for %d prompts; retrying individually.",
+                len(batch),
+            )
+            for prompt, future in batch:
+                if future.done():
+                    continue
+                try:
+                    result = await loop.run_in_executor(
+                        generation_pool,
+                        generate_batch,
+                        model,
+                        tokenizer,
+                        [prompt],
+                        settings,
+                        prompt_prefix_ids,
+                    )
+                except Exception as single_exc:
+                    logger.exception("Generation failed.")
+                    if not future.done():
+                        future.set_exception(single_exc)
+                else:
+                    if not future.done():
+                        future.set_result(result[0])
+            continue
+
+        # Requests whose client went away have cancelled futures; skip them.
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
 
 
 @app.on_event("startup")
 async def startup_event():
-    global model, tokenizer, rag_pipeline
+    global model, tokenizer, rag_pipeline, prompt_prefix_ids
+    global generation_queue, batch_worker_task, generation_pool, cpu_pool
+    generation_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gen")
+    cpu_pool = ThreadPoolExecutor(
+        max_workers=os.cpu_count() or 1, thread_name_prefix="cpu"
+    )
     loop = asyncio.get_event_loop()
-    model, tokenizer = await loop.run_in_executor(None, load_llm, settings)
+    model, tokenizer = await loop.run_in_executor(generation_pool, load_llm, settings)
+    prompt_prefix_ids = encode_prompt_prefix(tokenizer, PROMPT_PREFIX)
     rag_pipeline = RAGPipeline(settings)
+
+    # Pay the one-off embedder, FAISS page-in, CUDA autotune and torch.compile
+    # costs here instead of on the first /analyze request.
+    rag_pipeline.retrieve("warmup", 1)
+    await loop.run_in_executor(
+        generation_pool,
+        partial(
+            generate_text,
+            model,
+            tokenizer,
+            "warmup",
+            settings,
+            prompt_prefix_ids,
+            max_new_tokens=8,
+        ),
+    )
+
+    generation_queue = asyncio.Queue()
+    batch_worker_task = asyncio.create_task(_batch_worker())
     logger.info(
         "FinGPT backend ready with %d indexed documents.", rag_pipeline.document_count
     )
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    if batch_worker_task is not None:
+        batch_worker_task.cancel()
+    for pool in (generation_pool, cpu_pool):
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
 @app.get("/health")
 async def health_check():
     ready = model is not None and rag_pipeline is not None
@@ -104,7 +242,8 @@ async def health_check():
 async def market_overview():
     """Return a lightweight market snapshot derived from local stocks.csv."""
     try:
-        symbols = _market_overview()
+        loop = asyncio.get_event_loop()
+        symbols = await loop.run_in_executor(cpu_pool, _market_overview)
     except Exception as exc:
         # Graceful degradation if file is missing or bad
         return {"symbols": []}
@@ -114,37 +253,27 @@ async def market_overview():
 
 @app.post("/analyze", response_model=AnalyzeResponse)
 async def analyze(request: AnalyzeRequest):
-    if model is None or tokenizer is None or rag_pipeline is None:
+    if (
+        model is None
+        or tokenizer is None
+        or rag_pipeline is None
+        or generation_queue is None
+    ):
         raise HTTPException(status_code=503, detail="Model is still loading.")
 
     # Retrieve context
     retrieved = rag_pipeline.retrieve(request.query, settings.retrieval_k)
     
-    context_blocks = []
-    if retrieved:
-        for item in retrieved:
-            block = f"[{item.get('source', 'data')} - {item.get('id')}] {item.get('snippet')}"
-            context_blocks.append(block)
-    else:
-        # Even if no context is found, we still let the model try to answer 
-        # based on its internal knowledge or state it doesn't know.
-        context_blocks.append("No specific internal documents found.")
-        
-    context = "\n\n".join(context_blocks)
+    context = _format_context(retrieved)
 
     # Construct a compact prompt to reduce the chance of the model simply echoing
-    # the instructions instead of generating a fresh answer.
-    system_role = (
-        "You are FinGPT, a professional financial analyst. "
-        "Always answer in concise, formal English."
-    )
-
+    # the instructions instead of generating a fresh answer. The PROMPT_PREFIX
+    # (system role) is already tokenized, so only the tail is built here.
     profile_line = ""
     if request.user_profile:
         profile_line = f"User profile (goal / risk / horizon): {request.user_profile}."
 
-    prompt = (
-        f"{system_role}\n"
+    prompt_tail = (
         f"{profile_line}\n\n"
         f"Context from local database:\n{context}\n\n"
         f"Question: {request.query}\n\n"
@@ -153,9 +282,8 @@ async def analyze(request: AnalyzeRequest):
         "Answer:"
     )
 
-    loop = asyncio.get_event_loop()
-    result = await loop.run_in_executor(
-        None, generate_text, model, tokenizer, prompt, settings
-    )
+    future = asyncio.get_running_loop().create_future()
+    await generation_queue.put((prompt_tail, future))
+    result = await future
 
     return AnalyzeResponse(result=result, sources=retrieved)
@@ -21,12 +21,19 @@ class Settings:
     embedding_model_id: str = os.getenv(
         "EMBEDDING_MODEL_ID", "sentence-transformers/all-MiniLM-L6-v2"
     )
+    # Run CPU query embeddings through ONNX Runtime when it is installed
+    use_onnx_encoder: bool = os.getenv("USE_ONNX_ENCODER", "true").lower() == "true"
     retrieval_k: int = int(os.getenv("RETRIEVAL_K", 4))
     max_new_tokens: int = int(os.getenv("MAX_NEW_TOKENS", 512))
     temperature: float = float(os.getenv("TEMPERATURE", 0.2))
     top_p: float = float(os.getenv("TOP_P", 0.9))
+    # Micro-batching of concurrent /analyze requests
+    max_batch_size: int = int(os.getenv("MAX_BATCH_SIZE", 8))
+    batch_wait_ms: float = float(os.getenv("BATCH_WAIT_MS", 20))
     use_quantization: bool = os.getenv("USE_QUANTIZATION", "true").lower() == "true"
     load_in_4bit: bool = os.getenv("LOAD_IN_4BIT", "true").lower() == "true"
+    # Compile the model forward with torch.compile (CUDA only)
+    use_torch_compile: bool = os.getenv("USE_TORCH_COMPILE", "true").lower() == "true"
     data_dir: Path = field(default_factory=lambda: BASE_DIR / "data")
     cache_dir: Path = field(default_factory=lambda: BASE_DIR / "data" / "cache")
     # Where the downloaded base model will be stored locally
@@ -7,7 +7,7 @@ from typing import Tuple
 
 import torch
 from peft import PeftModel
-from huggingface_hub import snapshot_download
+from huggingface_hub import HfApi, snapshot_download
 from transformers import (
     AutoModel,
     AutoModelForCausalLM,
@@ -20,6 +20,12 @@ from .config import Settings
 
 logger = logging.getLogger(__name__)
 
+# Written into the local model dir after a complete download; holds "<repo>@<commit>".
+SNAPSHOT_SENTINEL = ".snapshot_ok"
+
+# A run of 6+ CJK unified ideographs marks where the model drifted into Chinese.
+_CJK_BLOCK_RE = re.compile(r"[\u4e00-\u9fff]{6,}")
+
 
 def _resolve_model_location(settings: Settings) -> str:
     candidate_path = Path(settings.base_model_id)
@@ -27,18 +33,37 @@ def _resolve_model_location(settings: Settings) -> str:
         return str(candidate_path)
 
     download_target = settings.local_model_dir
+    sentinel = download_target / SNAPSHOT_SENTINEL
+    try:
+        cached_repo, _, cached_revision = (
+            sentinel.read_text(encoding="utf-8").strip().partition("@")
+        )
+    except OSError:
+        cached_repo, cached_revision = "", ""
+    if cached_repo == settings.base_model_id and cached_revision:
+        logger.info(
+            "Using cached snapshot of %s (%s) at %s.",
+            cached_repo,
+            cached_revision,
+            download_target,
+        )
+        return str(download_target)
+
     logger.info(
         "Local model not found at %s. Downloading %s to %s.",
         candidate_path,
         settings.base_model_id,
         download_target,
     )
+    revision = HfApi().model_info(settings.base_model_id).sha
     snapshot_download(
         repo_id=settings.base_model_id,
+        revision=revision,
         local_dir=str(download_target),
         local_dir_use_symlinks=False,
         resume_download=True,
     )
+    sentinel.write_text(f"{settings.base_model_id}@{revision}", encoding="utf-8")
     return str(download_target)
 
 
@@ -70,11 +95,19 @@ def load_llm(settings: Settings) -> Tuple[PeftModel, AutoTokenizer]:
     """Load base model + FinGPT LoRA adapter into memory once."""
     resolved_model = _resolve_model_location(settings)
     logger.info("Loading base model %s", resolved_model)
-    tokenizer = AutoTokenizer.from_pretrained(
-        resolved_model,
-        use_fast=False,
-        trust_remote_code=settings.trust_remote_code,
-    )
+    tokenizer_kwargs = {
+        "trust_remote_code": settings.trust_remote_code,
+        "local_files_only": True,
+    }
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(
+            resolved_model, use_fast=True, **tokenizer_kwargs
+        )
+    except Exception as exc:
+        logger.warning("Fast tokenizer unavailable (%s). Using slow tokenizer.", exc)
+        tokenizer = AutoTokenizer.from_pretrained(
+            resolved_model, use_fast=False, **tokenizer_kwargs
+        )
 
     if tokenizer.pad_token is None:
         tokenizer.pad_token = tokenizer.eos_token
@@ -103,6 +136,7 @@ def load_llm(settings: Settings) -> Tuple[PeftModel, AutoTokenizer]:
         "torch_dtype": torch_dtype,
         "device_map": device_map,
         "trust_remote_code": settings.trust_remote_code,
+        "local_files_only": True,
     }
     if quant_config is not None:
         model_kwargs["quantization_config"] = quant_config
@@ -116,6 +150,7 @@ def load_llm(settings: Settings) -> Tuple[PeftModel, AutoTokenizer]:
             torch_dtype=torch.float32,
             device_map={"": "cpu"},
             trust_remote_code=settings.trust_remote_code,
+            local_files_only=True,
         )
 
     # Attach LoRA adapter if available; otherwise, fall back to base model
@@ -143,6 +178,26 @@ def load_llm(settings: Settings) -> Tuple[PeftModel, AutoTokenizer]:
         elif tokenizer.eos_token_id is not None:
             model.config.pad_token_id = tokenizer.eos_token_id
 
+    # Decoding is memory-bound: always reuse the KV cache, and use a static cache
+    # where the architecture supports it.
+    model.config.use_cache = True
+    model.eval()
+    # Same check generate() uses on transformers 4.39 to accept a static cache
+    # (e.g. Llama/Gemma have _setup_cache; Qwen2 does not).
+    static_cache = callable(getattr(base_model, "_setup_cache", None))
+    if static_cache:
+        base_model.generation_config.cache_implementation = "static"
+
+    # Compile only with a static cache: with a dynamic KV cache every new sequence
+    # length / batch size would recompile (or record a new CUDA graph). Compile the
+    # underlying transformer's forward, since PeftModel.generate delegates to the
+    # base model's generate(), which calls base_model.forward directly.
+    if static_cache and settings.use_torch_compile and torch.cuda.is_available():
+        logger.info("Compiling model forward with torch.compile.")
+        base_model.forward = torch.compile(
+            base_model.forward, mode="reduce-overhead", fullgraph=False
+        )
+
     return model, tokenizer
 
 
@@ -156,50 +211,41 @@ def build_generation_config(settings: Settings) -> GenerationConfig:
     )
 
 
-def generate_text(
-    model: PeftModel, tokenizer: AutoTokenizer, prompt: str, settings: Settings
-) -> str:
-    max_input_length = min(4096, getattr(tokenizer, "model_max_length", 4096))
-    inputs = tokenizer(
-        prompt,
-        return_tensors="pt",
-        truncation=True,
-        padding=True,
-        max_length=max_input_length,
-    )
-    device = next(model.parameters()).device
-    inputs = {k: v.to(device) for k, v in inputs.items()}
+def encode_prompt_prefix(tokenizer: AutoTokenizer, prefix: str) -> list[int]:
+    """Tokenize a static prompt prefix once so requests only encode their tail."""
+    prefix_ids = list(tokenizer(prefix).input_ids)
+    eos_id = tokenizer.eos_token_id
+    if eos_id is not None and prefix_ids and prefix_ids[-1] == eos_id:
+        prefix_ids = prefix_ids[:-1]
+    return prefix_ids
+
+
+def _prompt_input_ids(
+    tokenizer: AutoTokenizer,
+    prompt: str,
+    max_input_length: int,
+    prefix_ids: list[int] | None,
+) -> list[int]:
+    if prefix_ids is None:
+        input_ids = list(
+            tokenizer(prompt, truncation=True, max_length=max_input_length).input_ids
+        )
+    else:
+        tail_ids = tokenizer(prompt, add_special_tokens=False).input_ids
+        input_ids = (prefix_ids + list(tail_ids))[:max_input_length]
 
     # For some chat models (including Qwen), the tokenizer may append an EOS
     # token at the end of the prompt. If we leave it there, the HF generate()
     # loop can treat the sequence as already finished and immediately return
     # the prompt without generating any new tokens. To avoid this, we strip a
-    # single trailing EOS token (and its mask) if present.
+    # single trailing EOS token if present.
     eos_id = tokenizer.eos_token_id
-    if eos_id is not None and "input_ids" in inputs:
-        input_ids = inputs["input_ids"]
-        if input_ids.shape[1] > 0 and input_ids[0, -1].item() == eos_id:
-            inputs["input_ids"] = input_ids[:, :-1]
-            if "attention_mask" in inputs:
-                inputs["attention_mask"] = inputs["attention_mask"][:, :-1]
+    if eos_id is not None and input_ids and input_ids[-1] == eos_id:
+        input_ids = input_ids[:-1]
+    return input_ids
 
-    # Ensure we always ask for a reasonable amount of new tokens even if an
-    # environment variable accidentally sets MAX_NEW_TOKENS too low.
-    max_new_tokens = max(64, int(getattr(settings, "max_new_tokens", 256)))
-
-    with torch.no_grad():
-        outputs = model.generate(
-            **inputs,
-            max_new_tokens=max_new_tokens,
-            temperature=settings.temperature,
-            top_p=settings.top_p,
-            do_sample=True,
-            repetition_penalty=1.05,
-            pad_token_id=getattr(model.config, "pad_token_id", tokenizer.eos_token_id),
-        )
-
-    text = tokenizer.decode(outputs[0], skip_special_tokens=True)
 
+def _clean_output(text: str, prompt: str) -> str:
     # Try to remove the original prompt if model simply echoes it.
     # Only strip it when there is non-empty content after the prompt;
     # otherwise keep the raw text so we never end up returning an empty string.
@@ -212,8 +258,77 @@ def generate_text(
     cleaned = cleaned.strip()
 
     # If the model starts producing a long Chinese segment, truncate before it
-    chinese_block = re.search(r"[\u4e00-\u9fff]{6,}", cleaned)
+    chinese_block = _CJK_BLOCK_RE.search(cleaned)
     if chinese_block:
         cleaned = cleaned[: chinese_block.start()].strip()
 
     return cleaned
+
+
+def generate_batch(
+    model: PeftModel,
+    tokenizer: AutoTokenizer,
+    prompts: list[str],
+    settings: Settings,
+    prefix_ids: list[int] | None = None,
+    max_new_tokens: int | None = None,
+) -> list[str]:
+    """Generate answers for several prompts with a single ``model.generate`` call.
+
+    When ``prefix_ids`` (from :func:`encode_prompt_prefix`) is given, each prompt
+    is only the dynamic tail that follows that pre-tokenized prefix. An explicit
+    ``max_new_tokens`` is used as-is (e.g. for a short warmup run).
+    """
+    max_input_length = min(4096, getattr(tokenizer, "model_max_length", 4096))
+    rows = [
+        _prompt_input_ids(tokenizer, prompt, max_input_length, prefix_ids)
+        for prompt in prompts
+    ]
+
+    # Left-pad (matching tokenizer.padding_side) so every prompt ends right
+    # where generation starts.
+    pad_id = tokenizer.pad_token_id
+    width = max(len(ids) for ids in rows)
+    device = next(model.parameters()).device
+    input_ids = torch.tensor(
+        [[pad_id] * (width - len(ids)) + ids for ids in rows], device=device
+    )
+    attention_mask = torch.tensor(
+        [[0] * (width - len(ids)) + [1] * len(ids) for ids in rows], device=device
+    )
+
+    # Ensure we always ask for a reasonable amount of new tokens even if an
+    # environment variable accidentally sets MAX_NEW_TOKENS too low.
+    if max_new_tokens is None:
+        max_new_tokens = max(64, int(getattr(settings, "max_new_tokens", 256)))
+
+    with torch.no_grad():
+        outputs = model.generate(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            max_new_tokens=max_new_tokens,
+            temperature=settings.temperature,
+            top_p=settings.top_p,
+            do_sample=True,
+            repetition_penalty=1.05,
+            pad_token_id=getattr(model.config, "pad_token_id", tokenizer.eos_token_id),
+        )
+
+    return [
+        _clean_output(tokenizer.decode(output, skip_special_tokens=True), prompt)
+        for output, prompt in zip(outputs, prompts)
+    ]
+
+
+def generate_text(
+    model: PeftModel,
+    tokenizer: AutoTokenizer,
+    prompt: str,
+    settings: Settings,
+    prefix_ids: list[int] | None = None,
+    max_new_tokens: int | None = None,
+) -> str:
+    """Generate an answer for a single prompt (see :func:`generate_batch`)."""
+    return generate_batch(
+        model, tokenizer, [prompt], settings, prefix_ids, max_new_tokens
+    )[0]
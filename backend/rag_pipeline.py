@@ -1,20 +1,45 @@
 from __future__ import annotations
 
+import hashlib
+import inspect
 import json
 import logging
+import mmap
+import os
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List
+from types import MappingProxyType
+from typing import Dict, List, Mapping
 
 import faiss
+import msgspec
 import numpy as np
 import pandas as pd
+import torch
 from sentence_transformers import SentenceTransformer
 
 from .config import Settings
 
+try:
+    import onnxruntime as ort
+except ImportError:  # pragma: no cover - optional accelerator
+    ort = None
+
 logger = logging.getLogger(__name__)
 
+QUERY_CACHE_SIZE = 1024
+# Bump when the on-disk cache layout changes so stale caches rebuild once.
+CACHE_VERSION = "v2"
+STOCK_COLUMNS = ["symbol", "date", "open", "high", "low", "close", "volume"]
+
+
+def read_csv_fast(path: Path, columns: List[str] | None = None) -> pd.DataFrame:
+    """Read a CSV with Arrow's multithreaded parser, keeping Arrow-backed dtypes."""
+    return pd.read_csv(
+        path, engine="pyarrow", dtype_backend="pyarrow", usecols=columns
+    )
+
 
 @dataclass
 class Document:
@@ -32,18 +57,37 @@ class Document:
 class RAGPipeline:
     def __init__(self, settings: Settings):
         self.settings = settings
-        self.embedder = SentenceTransformer(settings.embedding_model_id)
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.embedder = SentenceTransformer(
+            settings.embedding_model_id, device=self.device
+        )
+        if self.device == "cuda":
+            # One shared fp16 GPU instance serves both the index build and queries;
+            # FAISS still receives float32 vectors.
+            self.embedder = self.embedder.half()
+        # Parsed once and shared with the /market_overview endpoint.
+        self.stocks_frame: pd.DataFrame | None = (
+            read_csv_fast(settings.stocks_file, STOCK_COLUMNS)
+            if settings.stocks_file.exists()
+            else None
+        )
         self.documents: List[Document] = self._load_documents()
         if not self.documents:
             raise RuntimeError("No documents found for RAG pipeline.")
 
         self.cache_dir = settings.cache_dir
-        self.index_path = self.cache_dir / "rag.index"
-        self.meta_path = self.cache_dir / "rag_metadata.json"
+        self.index_path = self.cache_dir / "rag.hnsw_sq8.index"
+        self.meta_path = self.cache_dir / "rag_metadata.mp"
         self._fingerprint = self._compute_fingerprint()
 
-        self.metadata: List[Dict[str, str]] = [doc.payload() for doc in self.documents]
+        self.metadata: List[Mapping[str, str]] = [
+            doc.payload() for doc in self.documents
+        ]
         self.index = self._load_or_build_index()
+        # Payloads are read-only after load; retrieve() merges scores into new dicts.
+        self.metadata = [MappingProxyType(meta) for meta in self.metadata]
+        self._query_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._onnx_session = self._load_onnx_encoder()
 
     @property
     def document_count(self) -> int:
@@ -51,85 +95,183 @@ class RAGPipeline:
 
     def retrieve(self, query: str, top_k: int | None = None) -> List[Dict[str, str]]:
         top_k = top_k or self.settings.retrieval_k
-        query_vec = self.embedder.encode(
-            [query], normalize_embeddings=True, convert_to_numpy=True
-        ).astype("float32")
+        query_vec = self._encode_query(query)
         k = max(1, min(top_k, self.index.ntotal))
         scores, indices = self.index.search(query_vec, k)
-        raw_results: List[Dict[str, str]] = []
+        if indices[0][0] == -1:
+            return []
+
+        # FAISS returns hits best-first, so the first score is the maximum.
+        # Filter out clearly irrelevant documents by a relative score threshold.
+        max_score = float(scores[0][0])
+        threshold = max_score * 0.6 if max_score > 0 else float("-inf")
+        results: List[Dict[str, str]] = []
         for idx, score in zip(indices[0], scores[0]):
             if idx == -1:
                 continue
-            payload = self.metadata[idx].copy()
-            payload["score"] = float(score)
-            raw_results.append(payload)
+            score = float(score)
+            if score >= threshold:
+                results.append({**self.metadata[int(idx)], "score": score})
+        return results
+
+    # Internal helpers -----------------------------------------------------
+    def _encode_query(self, query: str) -> np.ndarray:
+        """Return the normalized float32 embedding for a query, LRU-cached."""
+        cached = self._query_cache.get(query)
+        if cached is not None:
+            self._query_cache.move_to_end(query)
+            return cached
 
-        if not raw_results:
-            return raw_results
+        if self._onnx_session is not None:
+            query_vec = self._encode_onnx(query)
+        else:
+            with torch.inference_mode():
+                query_vec = self.embedder.encode(
+                    [query], normalize_embeddings=True, convert_to_numpy=True
+                ).astype("float32")
+        self._query_cache[query] = query_vec
+        if len(self._query_cache) > QUERY_CACHE_SIZE:
+            self._query_cache.popitem(last=False)
+        return query_vec
 
-        # Filter out clearly irrelevant documents by a relative score threshold
-        max_score = max(item["score"] for item in raw_results)
-        if max_score <= 0:
-            return raw_results
+    def _encode_onnx(self, query: str) -> np.ndarray:
+        encoded = self.embedder.tokenizer(
+            [query],
+            padding=True,
+            truncation=True,
+            max_length=self.embedder.max_seq_length,
+            return_tensors="np",
+        )
+        feeds = {
+            "input_ids": encoded["input_ids"].astype("int64"),
+            "attention_mask": encoded["attention_mask"].astype("int64"),
+        }
+        hidden = self._onnx_session.run(None, feeds)[0]
+        mask = feeds["attention_mask"][..., None].astype("float32")
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled.astype("float32")
 
-        threshold = max_score * 0.6
-        filtered = [item for item in raw_results if item["score"] >= threshold]
-        return filtered or raw_results
+    def _load_onnx_encoder(self):
+        """Export the query encoder to ONNX once and open an ONNX Runtime session.
+
+        Only used on CPU for plain mean-pooling models (e.g. MiniLM); otherwise
+        queries keep going through the PyTorch SentenceTransformer.
+        """
+        if not self.settings.use_onnx_encoder or ort is None or self.device != "cpu":
+            return None
+        module_names = [type(module).__name__ for module in self.embedder]
+        if module_names not in (
+            ["Transformer", "Pooling"],
+            ["Transformer", "Pooling", "Normalize"],
+        ) or self.embedder[1].get_pooling_mode_str() != "mean":
+            logger.info("Embedding model is not plain mean pooling; skipping ONNX.")
+            return None
+
+        onnx_path = (
+            self.cache_dir
+            / f"{self.settings.embedding_model_id.replace('/', '__')}.onnx"
+        )
+        try:
+            if not onnx_path.exists():
+                logger.info("Exporting query encoder to %s.", onnx_path)
+                dummy = self.embedder.tokenizer(["warmup"], return_tensors="pt")
+                # Newer torch defaults to the dynamo exporter, which needs onnxscript.
+                export_kwargs = (
+                    {"dynamo": False}
+                    if "dynamo" in inspect.signature(torch.onnx.export).parameters
+                    else {}
+                )
+                with torch.no_grad():
+                    torch.onnx.export(
+                        _HiddenStateEncoder(self.embedder[0].auto_model),
+                        (dummy["input_ids"], dummy["attention_mask"]),
+                        str(onnx_path),
+                        input_names=["input_ids", "attention_mask"],
+                        output_names=["last_hidden_state"],
+                        dynamic_axes={
+                            "input_ids": {0: "batch", 1: "sequence"},
+                            "attention_mask": {0: "batch", 1: "sequence"},
+                            "last_hidden_state": {0: "batch", 1: "sequence"},
+                        },
+                        opset_version=14,
+                        **export_kwargs,
+                    )
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = os.cpu_count() or 1
+            return ort.InferenceSession(
+                str(onnx_path), options, providers=["CPUExecutionProvider"]
+            )
+        except Exception as exc:
+            logger.warning("ONNX query encoder unavailable (%s). Using PyTorch.", exc)
+            onnx_path.unlink(missing_ok=True)
+            return None
 
-    # Internal helpers -----------------------------------------------------
     def _compute_fingerprint(self) -> str:
-        parts = []
+        parts = [CACHE_VERSION]
         for file_path in (
             self.settings.news_file,
             self.settings.stocks_file,
             self.settings.reports_file,
         ):
             if file_path.exists():
-                stat = file_path.stat()
-                parts.append(f"{file_path.name}:{stat.st_mtime_ns}:{stat.st_size}")
+                parts.append(f"{file_path.name}:{_sha256_file(file_path)}")
         return "|".join(parts)
 
     def _load_or_build_index(self):
-        if (
-            self.index_path.exists()
-            and self.meta_path.exists()
-            and self._is_cache_valid()
-        ):
+        meta_content = self._read_cache_meta() if self.index_path.exists() else None
+        if meta_content and meta_content.get("fingerprint") == self._fingerprint:
             logger.info("Loading FAISS index from cache.")
             index = faiss.read_index(str(self.index_path))
-            with self.meta_path.open("r", encoding="utf-8") as meta_file:
-                meta_content = json.load(meta_file)
-                self.metadata = meta_content["metadata"]
+            self.metadata = meta_content["metadata"]
             return index
 
         logger.info("Building new FAISS index for %d documents.", len(self.documents))
         texts = [doc.text for doc in self.documents]
-        embeddings = self.embedder.encode(
-            texts,
-            batch_size=16,
-            show_progress_bar=False,
-            convert_to_numpy=True,
-            normalize_embeddings=True,
-        ).astype("float32")
-        index = faiss.IndexFlatIP(embeddings.shape[1])
+        num_threads = torch.get_num_threads()
+        if self.device == "cpu":
+            torch.set_num_threads(os.cpu_count() or num_threads)
+        try:
+            with torch.inference_mode():
+                embeddings = self.embedder.encode(
+                    texts,
+                    batch_size=128,
+                    show_progress_bar=False,
+                    convert_to_numpy=True,
+                    normalize_embeddings=True,
+                    device=self.device,
+                ).astype("float32")
+        finally:
+            torch.set_num_threads(num_threads)
+        # HNSW graph over inner product keeps cosine semantics for the normalized
+        # embeddings while making search sublinear in the corpus size; vectors
+        # are stored as 8-bit scalar codes (4x smaller than float32).
+        index = faiss.IndexHNSWSQ(
+            embeddings.shape[1],
+            faiss.ScalarQuantizer.QT_8bit,
+            32,
+            faiss.METRIC_INNER_PRODUCT,
+        )
+        index.hnsw.efConstruction = 64
+        index.train(embeddings)
         index.add(embeddings)
+        index.hnsw.efSearch = 40
         faiss.write_index(index, str(self.index_path))
-        with self.meta_path.open("w", encoding="utf-8") as meta_file:
-            json.dump(
-                {"fingerprint": self._fingerprint, "metadata": self.metadata},
-                meta_file,
-                ensure_ascii=False,
-                indent=2,
+        self.meta_path.write_bytes(
+            msgspec.msgpack.encode(
+                {"fingerprint": self._fingerprint, "metadata": self.metadata}
             )
+        )
         return index
 
-    def _is_cache_valid(self) -> bool:
+    def _read_cache_meta(self) -> Dict | None:
         try:
-            with self.meta_path.open("r", encoding="utf-8") as meta_file:
-                meta_content = json.load(meta_file)
-            return meta_content.get("fingerprint") == self._fingerprint
-        except (json.JSONDecodeError, FileNotFoundError):
-            return False
+            with self.meta_path.open("rb") as meta_file, mmap.mmap(
+                meta_file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as buffer:
+                return msgspec.msgpack.decode(buffer)
+        except (OSError, ValueError, msgspec.DecodeError):
+            return None
 
     def _load_documents(self) -> List[Document]:
         documents: List[Document] = []
@@ -142,41 +284,42 @@ class RAGPipeline:
         if not self.settings.news_file.exists():
             logger.warning("News file %s not found.", self.settings.news_file)
             return []
-        df = pd.read_csv(self.settings.news_file)
-        documents = []
-        for idx, row in df.iterrows():
-            text = (
-                f"News ({row.get('date', 'N/A')}): {row.get('headline', '')}. "
-                f"Body: {row.get('body', '')}. Reported sentiment: {row.get('sentiment', 'neutral')}."
+        df = read_csv_fast(self.settings.news_file)
+        dates = _text_column(df, "date", "N/A")
+        headlines = _text_column(df, "headline", "")
+        bodies = _text_column(df, "body", "")
+        sentiments = _text_column(df, "sentiment", "neutral")
+        texts = (
+            "News (" + dates + "): " + headlines + ". Body: " + bodies
+            + ". Reported sentiment: " + sentiments + "."
+        ).tolist()
+        metadatas = pd.DataFrame(
+            {
+                "headline": headlines,
+                "date": _text_column(df, "date", ""),
+                "sentiment": sentiments,
+            }
+        ).to_dict("records")
+        return [
+            Document(
+                doc_id=f"news-{idx}", source="news", text=text, metadata=metadata
             )
-            documents.append(
-                Document(
-                    doc_id=f"news-{idx}",
-                    source="news",
-                    text=text,
-                    metadata={
-                        "headline": row.get("headline", ""),
-                        "date": str(row.get("date", "")),
-                        "sentiment": row.get("sentiment", "neutral"),
-                    },
-                )
-            )
-        return documents
+            for idx, text, metadata in zip(df.index, texts, metadatas)
+        ]
 
     def _load_stock_documents(self) -> List[Document]:
-        if not self.settings.stocks_file.exists():
+        if self.stocks_frame is None:
             logger.warning("Stock file %s not found.", self.settings.stocks_file)
             return []
-        df = pd.read_csv(self.settings.stocks_file)
+        df = self.stocks_frame
         documents = []
         grouped = df.groupby("symbol")
         for symbol, subset in grouped:
             latest_rows = subset.tail(5)
-            summary_rows = []
-            for _, row in latest_rows.iterrows():
-                summary_rows.append(
-                    f"{row['date']}: open {row['open']}, high {row['high']}, low {row['low']}, close {row['close']}, volume {row['volume']}"
-                )
+            summary_rows = [
+                f"{row.date}: open {row.open}, high {row.high}, low {row.low}, close {row.close}, volume {row.volume}"
+                for row in latest_rows.itertuples(index=False)
+            ]
             text = (
                 f"Stock performance for {symbol}. Recent candles:\n"
                 + "\n".join(summary_rows)
@@ -222,3 +365,33 @@ class RAGPipeline:
             )
         return documents
 
+
+class _HiddenStateEncoder(torch.nn.Module):
+    """Expose a HF encoder's last hidden state as a plain tensor for ONNX export."""
+
+    def __init__(self, transformer: torch.nn.Module):
+        super().__init__()
+        self.transformer = transformer
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor):
+        return self.transformer(
+            input_ids=input_ids, attention_mask=attention_mask
+        ).last_hidden_state
+
+
+def _sha256_file(path: Path) -> str:
+    """Hash file contents so touched-but-unchanged data does not trigger a rebuild."""
+    with path.open("rb") as handle:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            return hashlib.file_digest(handle, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+
+def _text_column(df: pd.DataFrame, column: str, default: str) -> pd.Series:
+    """Return ``column`` as strings with missing values (or column) set to ``default``."""
+    if column not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    return df[column].fillna(default).astype(str)
@@ -1,15 +1,25 @@
 from __future__ import annotations
 
+import asyncio
 import csv
+import io
 import json
-import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable
-import xml.etree.ElementTree as ET
 
+import aiohttp
+import numpy as np
 import pandas as pd
-import requests
+from aiolimiter import AsyncLimiter
+from lxml import etree
+from tenacity import (
+    RetryCallState,
+    retry,
+    retry_if_exception,
+    stop_after_attempt,
+    wait_exponential,
+)
 
 
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -30,93 +40,263 @@ STOOQ_SYMBOL_MAP = {
     "0939.HK": "0939.hk",
 }
 
+assert set(ALL_TICKERS) <= STOOQ_SYMBOL_MAP.keys(), "every ticker needs a Stooq code"
+# (ticker, Stooq code) pairs resolved once at import time.
+_STOOQ_PAIRS = tuple((sym, STOOQ_SYMBOL_MAP[sym]) for sym in ALL_TICKERS)
+
+HTTP_TIMEOUT = aiohttp.ClientTimeout(total=15)
+# Cap in-flight requests per provider so the fan-out does not trip rate limits.
+MAX_CONCURRENCY = 8
+# Token bucket for stooq.com requests: at most 5 per second.
+STOOQ_RATE = (5, 1)
+
+
+# Responses worth retrying: throttling and transient upstream failures.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+_BACKOFF = wait_exponential(multiplier=0.5, max=8)
+# Upper bound on a server-supplied Retry-After, so one 429 cannot stall the run.
+MAX_RETRY_AFTER = 60.0
+
+
+def _is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status in RETRY_STATUSES
+    return isinstance(exc, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+def _retry_wait(retry_state: RetryCallState) -> float:
+    """Back off exponentially, but honor a numeric Retry-After header (e.g. on 429).
+
+    Retry-After is capped at ``MAX_RETRY_AFTER`` seconds.
+    """
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, aiohttp.ClientResponseError) and exc.headers:
+        retry_after = exc.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_AFTER)
+    return _BACKOFF(retry_state)
+
+
+_http_retry = retry(
+    retry=retry_if_exception(_is_transient),
+    wait=_retry_wait,
+    stop=stop_after_attempt(5),
+    reraise=True,
+)
+
+
+STOCK_COLUMNS = ["symbol", "date", "open", "high", "low", "close", "volume"]
+# Numeric stock columns, shared by fresh downloads and rows replayed from the HTTP
+# cache. Volume is the nullable Int64 so a blank cell keeps the row instead of
+# failing the whole parse (or turning every volume into a float).
+STOCK_DTYPES = {
+    "open": "float64",
+    "high": "float64",
+    "low": "float64",
+    "close": "float64",
+    "volume": "Int64",
+}
+# Stooq history header: Date,Open,High,Low,Close,Volume
+STOOQ_HISTORY_DTYPES = {col.capitalize(): dtype for col, dtype in STOCK_DTYPES.items()}
+
+# Per-symbol ETag / Last-Modified validators and rows for conditional requests.
+HTTP_CACHE_FILE = ".http_cache.json"
 
-def fetch_stooq_history(symbol: str, days: int = 180) -> list[list]:
-    """Fetch daily OHLCV data for a symbol from Stooq (no auth, CSV)."""
-    code = STOOQ_SYMBOL_MAP.get(symbol)
-    if not code:
-        return []
 
+def _new_session() -> aiohttp.ClientSession:
+    # One pooled session per run: requests to the same host reuse keep-alive
+    # connections instead of paying a TCP/TLS handshake each.
+    connector = aiohttp.TCPConnector(
+        limit=32, limit_per_host=MAX_CONCURRENCY, keepalive_timeout=30
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+def _conditional_headers(cached: dict) -> dict[str, str]:
+    """If-None-Match / If-Modified-Since from a symbol's saved validators."""
+    headers = {}
+    if "rows" in cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
+
+@_http_retry
+async def fetch_stooq_history(
+    symbol: str,
+    code: str,
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+    limiter: AsyncLimiter,
+    http_cache: dict[str, dict],
+    days: int = 180,
+) -> pd.DataFrame:
+    """Fetch daily OHLCV data for a symbol from Stooq (no auth, CSV).
+
+    ``code`` is the symbol's Stooq code (see ``STOOQ_SYMBOL_MAP``). ``http_cache``
+    maps symbols to their last ETag/Last-Modified and rows; it is
+    used for a conditional request and updated in place after a fresh download.
+    """
     url = f"https://stooq.com/q/d/l/?s={code}&i=d"
-    resp = requests.get(url, timeout=15)
-    resp.raise_for_status()
+    cached = http_cache.get(symbol, {})
+    headers = _conditional_headers(cached)
+
+    async with sem, limiter, session.get(
+        url, headers=headers, timeout=HTTP_TIMEOUT
+    ) as resp:
+        if resp.status == 304 and "rows" in cached:
+            return pd.DataFrame(cached["rows"][-days:], columns=STOCK_COLUMNS).astype(
+                STOCK_DTYPES
+            )
+        resp.raise_for_status()
+        # Raw bytes go straight to the C parser; no decoded str copy.
+        body = await resp.read()
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+
+    if not body.strip():
+        return pd.DataFrame(columns=STOCK_COLUMNS)
+    df = pd.read_csv(io.BytesIO(body), dtype=STOOQ_HISTORY_DTYPES)
+    if not {"Date", *STOOQ_HISTORY_DTYPES}.issubset(df.columns):
+        # e.g. Stooq answers "No data" for unknown symbols
+        return pd.DataFrame(columns=STOCK_COLUMNS)
 
-    lines = resp.text.splitlines()
-    reader = csv.reader(lines)
-    header = next(reader, None)
-    if not header:
-        return []
+    # Keep only the most recent `days` entries
+    df = (
+        df.dropna(subset=["Date"])
+        .tail(days)
+        .rename(columns=str.lower)
+        .assign(symbol=symbol)[STOCK_COLUMNS]
+    )
+    http_cache[symbol] = {
+        "etag": etag,
+        "last_modified": last_modified,
+        # pd.NA (blank volume) is not JSON-serializable; store it as null.
+        "rows": df.astype(object).where(df.notna(), None).to_dict("split")["data"],
+    }
+    return df
 
-    # Stooq header: Date,Open,High,Low,Close,Volume
-    rows: list[list] = []
-    for row in reader:
-        if not row or row[0] in ("Date", ""):
-            continue
-        date_str, open_p, high_p, low_p, close_p, volume = row
-        rows.append(
-            [
-                symbol,
-                date_str,
-                open_p,
-                high_p,
-                low_p,
-                close_p,
-                volume,
-            ]
-        )
 
-    # Keep only the most recent `days` entries
-    return rows[-days:]
+def _load_http_cache() -> dict[str, dict]:
+    try:
+        with (DATA_DIR / HTTP_CACHE_FILE).open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_http_cache(http_cache: dict[str, dict]) -> None:
+    with (DATA_DIR / HTTP_CACHE_FILE).open("w", encoding="utf-8") as f:
+        json.dump(http_cache, f, ensure_ascii=False)
+
+
+async def _gather_stocks(
+    session: aiohttp.ClientSession, sem: asyncio.Semaphore, limiter: AsyncLimiter
+) -> list[pd.DataFrame]:
+    """Fetch every ticker's history concurrently."""
+    http_cache = _load_http_cache()
+    tasks = [
+        fetch_stooq_history(sym, code, session, sem, limiter, http_cache, days=180)
+        for sym, code in _STOOQ_PAIRS
+    ]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.to_thread(_save_http_cache, http_cache)
+
+    frames: list[pd.DataFrame] = []
+    for sym, result in zip(ALL_TICKERS, results):
+        if isinstance(result, BaseException):  # pragma: no cover - network dependent
+            print(f"[stocks] Failed to fetch {sym}: {result}")
+            continue
+        frames.append(result)
+    return frames
+
+
+async def _stocks_up_to_date(
+    path: Path,
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+    limiter: AsyncLimiter,
+) -> bool:
+    """Whether Stooq has nothing newer than the history already in ``path``.
+
+    Sends one HEAD per ticker with the ETag/Last-Modified validators saved by the
+    last download. Any answer other than 304 (including errors) means a full
+    refresh; so does a ticker without saved validators, in which case no HEAD
+    requests are sent at all.
+    """
+    if not path.exists():
+        return False
+    http_cache = await asyncio.to_thread(_load_http_cache)
+    validators = {
+        sym: _conditional_headers(http_cache.get(sym, {})) for sym in ALL_TICKERS
+    }
+    if not all(validators.values()):
+        return False
+
+    async def not_modified(symbol: str, code: str) -> bool:
+        url = f"https://stooq.com/q/d/l/?s={code}&i=d"
+        async with sem, limiter, session.head(
+            url, headers=validators[symbol], timeout=HTTP_TIMEOUT
+        ) as resp:
+            return resp.status == 304
+
+    results = await asyncio.gather(
+        *(not_modified(sym, code) for sym, code in _STOOQ_PAIRS),
+        return_exceptions=True,
+    )
+    return all(result is True for result in results)
 
 
-def update_stocks_csv() -> None:
+async def update_stocks_csv(
+    session: aiohttp.ClientSession, sem: asyncio.Semaphore, limiter: AsyncLimiter
+) -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     path = DATA_DIR / "stocks.csv"
-    header = ["symbol", "date", "open", "high", "low", "close", "volume"]
 
-    all_rows: list[list] = []
-    for sym in ALL_TICKERS:
-        print(f"[stocks] Fetching history for {sym} ...")
-        try:
-            rows = fetch_stooq_history(sym, days=180)
-            all_rows.extend(rows)
-        except Exception as exc:  # pragma: no cover - network dependent
-            print(f"[stocks] Failed to fetch {sym}: {exc}")
-
-    if not all_rows:
+    if await _stocks_up_to_date(path, session, sem, limiter):
+        print(f"[stocks] {path} is up to date; skipping download.")
+        return
+
+    print(f"[stocks] Fetching history for {', '.join(ALL_TICKERS)} ...")
+    frames = [df for df in await _gather_stocks(session, sem, limiter) if not df.empty]
+
+    if not frames:
         print("[stocks] No data fetched; skipping write.")
         return
 
-    with path.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(header)
-        writer.writerows(all_rows)
-    print(f"[stocks] Wrote {len(all_rows)} rows to {path}")
+    stocks = pd.concat(frames, ignore_index=True)
+    # File writes run in a worker thread so they do not block the event loop.
+    await asyncio.to_thread(stocks.to_csv, path, index=False, encoding="utf-8")
+    print(f"[stocks] Wrote {len(stocks)} rows to {path}")
 
 
-def fetch_yahoo_rss(symbol: str) -> list[dict]:
+@_http_retry
+async def fetch_yahoo_rss(symbol: str, session: aiohttp.ClientSession) -> list[dict]:
     """Fetch recent headlines for a ticker from Yahoo Finance RSS."""
     # Yahoo RSS supports US tickers; HK tickers may not always have feeds.
     url = (
         f"https://feeds.finance.yahoo.com/rss/2.0/headline?s={symbol}"
         "&region=US&lang=en-US"
     )
-    resp = requests.get(url, timeout=15)
-    resp.raise_for_status()
-
-    root = ET.fromstring(resp.text)
-    channel = root.find("channel")
-    if channel is None:
-        return []
+    async with session.get(url, timeout=HTTP_TIMEOUT) as resp:
+        resp.raise_for_status()
+        body = await resp.read()
 
     items = []
-    for item in channel.findall("item"):
-        title_el = item.find("title")
-        desc_el = item.find("description")
-        pub_el = item.find("pubDate")
-        title = title_el.text if title_el is not None else ""
-        desc = desc_el.text if desc_el is not None else ""
-        pub = pub_el.text if pub_el is not None else ""
+    # Stream <item> elements with lxml's C parser, freeing each once read.
+    for _, item in etree.iterparse(
+        io.BytesIO(body), events=("end",), tag="item", resolve_entities=False
+    ):
+        title = item.findtext("title") or ""
+        desc = item.findtext("description") or ""
+        pub = item.findtext("pubDate") or ""
+        # Clearing alone leaves empty <item> shells attached to <channel>;
+        # drop the already-processed siblings too.
+        item.clear()
+        while item.getprevious() is not None:
+            del item.getparent()[0]
         if not title:
             continue
         items.append(
@@ -142,72 +322,65 @@ def update_news_csv() -> None:
         print("[news] stocks.csv not found; skipping news generation.")
         return
 
-    df = pd.read_csv(stocks_path)
+    # Only symbol/date/close feed the derived news. Categorical symbols make
+    # groupby hash small int codes instead of strings; categories are inferred
+    # rather than fixed to ALL_TICKERS because seeded data (scripts/seed_data.py)
+    # adds other symbols. Close stays float64 since it feeds the rounded percent
+    # moves and sentiment thresholds.
+    df = pd.read_csv(
+        stocks_path,
+        usecols=["symbol", "date", "close"],
+        dtype={"symbol": "category", "close": "float64"},
+        parse_dates=["date"],
+    )
     if df.empty:
         print("[news] stocks.csv is empty; skipping news generation.")
         return
 
     df = df.sort_values(["symbol", "date"])
-    news_rows: list[list[str]] = []
-
-    for symbol, group in df.groupby("symbol"):
-        group = group.reset_index(drop=True)
-        # Look at the last few days for each symbol
-        window = group.tail(5)
-        for i in range(1, len(window)):
-            today = window.iloc[i]
-            prev = window.iloc[i - 1]
-            close_today = float(today["close"])
-            close_prev = float(prev["close"])
-            if close_prev == 0:
-                continue
-            change = (close_today - close_prev) / close_prev * 100
-            date_str = str(today["date"])
-
-            direction = "rose" if change >= 0 else "declined"
-            sentiment = (
-                "positive"
-                if change > 0.5
-                else "negative"
-                if change < -0.5
-                else "neutral"
-            )
-            headline = f"{symbol} {direction} {abs(change):.2f}% on local session"
-            body = (
-                f"On {date_str}, {symbol} {direction} by {abs(change):.2f}% to close at {close_today:.2f}. "
-                f"Previous close was {close_prev:.2f}. "
-                "The move reflects short-term shifts in market sentiment captured in the local price data."
-            )
-            news_rows.append([date_str, headline, body, sentiment])
+    df["prev_close"] = df.groupby("symbol", observed=True)["close"].shift()
+    # Look at the last few days for each symbol: the last four sessions, each
+    # compared with the close before it.
+    recent = df.groupby("symbol", observed=True).tail(4)
+    recent = recent[recent["prev_close"].notna() & (recent["prev_close"] != 0)]
+
+    close_today = recent["close"].to_numpy()
+    close_prev = recent["prev_close"].to_numpy()
+    change = (close_today - close_prev) / close_prev * 100
+    direction = np.where(change >= 0, "rose", "declined")
+    sentiment = np.select(
+        [change > 0.5, change < -0.5], ["positive", "negative"], default="neutral"
+    )
+
+    dates = recent["date"].dt.strftime("%Y-%m-%d").to_numpy()
+    symbols = recent["symbol"].astype(str).to_numpy()
+    headlines = [
+        f"{symbol} {move} {abs(pct):.2f}% on local session"
+        for symbol, move, pct in zip(symbols, direction, change)
+    ]
+    bodies = [
+        f"On {date_str}, {symbol} {move} by {abs(pct):.2f}% to close at {today:.2f}. "
+        f"Previous close was {prev:.2f}. "
+        "The move reflects short-term shifts in market sentiment captured in the local price data."
+        for symbol, date_str, today, prev, pct, move in zip(
+            symbols, dates, close_today, close_prev, change, direction
+        )
+    ]
+    news_df = pd.DataFrame(
+        {"date": dates, "headline": headlines, "body": bodies, "sentiment": sentiment},
+        columns=header,
+    )
 
-    if not news_rows:
+    if news_df.empty:
         print("[news] No derived news items; skipping write.")
         return
 
-    with path.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(header)
-        writer.writerows(news_rows)
-    print(f"[news] Wrote {len(news_rows)} rows to {path}")
+    news_df.to_csv(path, index=False, encoding="utf-8")
+    print(f"[news] Wrote {len(news_df)} rows to {path}")
 
 
-def fetch_yahoo_report(symbol: str) -> dict | None:
-    """Fetch a coarse 'report-like' snapshot using Stooq quote data."""
-    code = STOOQ_SYMBOL_MAP.get(symbol)
-    if not code:
-        return None
-
-    # Stooq quote CSV: Symbol,Date,Time,Open,High,Low,Close,Volume,OpenInt
-    url = f"https://stooq.com/q/l/?s={code}&i=d"
-    resp = requests.get(url, timeout=15)
-    resp.raise_for_status()
-    lines = resp.text.splitlines()
-    reader = csv.reader(lines)
-    header = next(reader, None)
-    row = next(reader, None)
-    if not header or not row:
-        return None
-
+def _quote_report(symbol: str, row: list[str]) -> dict | None:
+    """Build a coarse 'report-like' snapshot from one Stooq quote CSV row."""
     try:
         _, date_str, _time, open_p, high_p, low_p, close_p, volume, *_ = row
     except ValueError:
@@ -227,44 +400,142 @@ def fetch_yahoo_report(symbol: str) -> dict | None:
     }
 
 
-def update_reports_json() -> None:
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-    path = DATA_DIR / "reports.json"
+@_http_retry
+async def fetch_yahoo_report(
+    symbol: str,
+    code: str,
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+    limiter: AsyncLimiter,
+) -> dict | None:
+    """Fetch a coarse 'report-like' snapshot using Stooq quote data."""
+    # Stooq quote CSV: Symbol,Date,Time,Open,High,Low,Close,Volume,OpenInt
+    url = f"https://stooq.com/q/l/?s={code}&i=d"
+    async with sem, limiter, session.get(url, timeout=HTTP_TIMEOUT) as resp:
+        resp.raise_for_status()
+        text = await resp.text()
+    lines = text.splitlines()
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    row = next(reader, None)
+    if not header or not row:
+        return None
+
+    return _quote_report(symbol, row)
+
+
+@_http_retry
+async def fetch_stooq_quotes(
+    pairs: Iterable[tuple[str, str]],
+    session: aiohttp.ClientSession,
+    sem: asyncio.Semaphore,
+    limiter: AsyncLimiter,
+) -> dict[str, dict]:
+    """Fetch quote snapshots for many symbols with one multi-symbol Stooq request.
+
+    Returns reports keyed by symbol; symbols missing from the response are absent.
+    """
+    by_code = {code: sym for sym, code in pairs}
+    if not by_code:
+        return {}
+
+    url = f"https://stooq.com/q/l/?s={','.join(by_code)}&i=d"
+    async with sem, limiter, session.get(url, timeout=HTTP_TIMEOUT) as resp:
+        resp.raise_for_status()
+        text = await resp.text()
+
+    reports: dict[str, dict] = {}
+    reader = csv.reader(text.splitlines())
+    next(reader, None)  # header
+    for row in reader:
+        # Stooq echoes the requested code upper-cased, e.g. AAPL.US
+        symbol = by_code.get(row[0].lower()) if row else None
+        if symbol is None:
+            continue
+        report = _quote_report(symbol, row)
+        if report:
+            reports[symbol] = report
+    return reports
+
+
+async def _gather_reports(
+    session: aiohttp.ClientSession, sem: asyncio.Semaphore, limiter: AsyncLimiter
+) -> list[dict]:
+    """Fetch every ticker's quote snapshot, batched into one request where possible."""
+    try:
+        batched = await fetch_stooq_quotes(_STOOQ_PAIRS, session, sem, limiter)
+    except Exception as exc:  # pragma: no cover - network dependent
+        print(f"[reports] Batched quote request failed ({exc}); fetching per symbol.")
+        batched = {}
+
+    # Fall back to one request per symbol for anything the batch did not return.
+    missing = [(sym, code) for sym, code in _STOOQ_PAIRS if sym not in batched]
+    tasks = [
+        fetch_yahoo_report(sym, code, session, sem, limiter) for sym, code in missing
+    ]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    fallback: dict[str, dict | None] = {}
+    for (sym, _), result in zip(missing, results):
+        if isinstance(result, BaseException):  # pragma: no cover - network dependent
+            print(f"[reports] Failed to fetch report for {sym}: {result}")
+            continue
+        fallback[sym] = result
 
     reports: list[dict] = []
     for sym in ALL_TICKERS:
-        print(f"[reports] Fetching quote summary for {sym} ...")
-        try:
-            rep = fetch_yahoo_report(sym)
-            if rep:
-                reports.append(rep)
-            time.sleep(1.0)
-        except Exception as exc:  # pragma: no cover - network dependent
-            print(f"[reports] Failed to fetch report for {sym}: {exc}")
+        result = batched.get(sym) or fallback.get(sym)
+        if result:
+            reports.append(result)
+    return reports
+
+
+def _write_json(path: Path, payload: list[dict]) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=4)
+
+
+async def update_reports_json(
+    session: aiohttp.ClientSession, sem: asyncio.Semaphore, limiter: AsyncLimiter
+) -> None:
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    path = DATA_DIR / "reports.json"
+
+    print(f"[reports] Fetching quote summaries for {', '.join(ALL_TICKERS)} ...")
+    reports = await _gather_reports(session, sem, limiter)
 
     if not reports:
         print("[reports] No report snapshots fetched; skipping write.")
         return
 
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(reports, f, ensure_ascii=False, indent=4)
+    await asyncio.to_thread(_write_json, path, reports)
     print(f"[reports] Wrote {len(reports)} entries to {path}")
 
 
-def main(selected: Iterable[str] | None = None) -> None:
+async def main_async(selected: Iterable[str] | None = None) -> None:
     print(f"Fetching live market data into {DATA_DIR} ...")
     tasks = set((selected or ["stocks", "news", "reports"]))
 
-    if "stocks" in tasks:
-        update_stocks_csv()
-    if "news" in tasks:
-        update_news_csv()
-    if "reports" in tasks:
-        update_reports_json()
+    # One concurrency cap and one token bucket for the whole run: the phases hit
+    # stooq.com back to back, so fresh (full) buckets per phase would exceed
+    # STOOQ_RATE.
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    limiter = AsyncLimiter(*STOOQ_RATE)
+    async with _new_session() as session:
+        if "stocks" in tasks:
+            await update_stocks_csv(session, sem, limiter)
+        if "news" in tasks:
+            # No network I/O, but reads and writes CSVs; keep it off the loop.
+            await asyncio.to_thread(update_news_csv)
+        if "reports" in tasks:
+            await update_reports_json(session, sem, limiter)
 
     print("Done. Restart the backend so the RAG index can be rebuilt.")
 
 
+def main(selected: Iterable[str] | None = None) -> None:
+    asyncio.run(main_async(selected))
+
+
 if __name__ == "__main__":
     # Run all three by default
     main()
@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import csv
 import json
-import random
 from dataclasses import dataclass
-from datetime import date, timedelta
+from datetime import date
+from functools import lru_cache
 from pathlib import Path
 
+import numpy as np
+
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
@@ -18,51 +20,64 @@ class StockConfig:
     start_price: float
 
 
+@lru_cache(maxsize=None)
+def _business_days(start_date: date, days: int) -> tuple[str, ...]:
+    """ISO dates of the first ``days`` weekdays on/after ``start_date``."""
+    dates = np.busday_offset(
+        np.datetime64(start_date, "D"), np.arange(days), roll="forward"
+    )
+    return tuple(dates.astype(str).tolist())
+
+
 def _generate_stock_series(config: StockConfig, start_date: date, days: int) -> list[list]:
     """Generate a simple synthetic OHLCV series for one symbol."""
-    rows: list[list] = []
-    price = config.start_price
-    current = start_date
-
-    while len(rows) < days:
-        # Skip weekends
-        if current.weekday() < 5:
-            open_p = price + random.uniform(-1.5, 1.5)
-            high_p = open_p + random.uniform(0.5, 4.0)
-            low_p = open_p - random.uniform(0.5, 4.0)
-            close_p = random.uniform(low_p, high_p)
-            volume = random.randint(18_000_000, 90_000_000)
-
-            rows.append(
-                [
-                    config.symbol,
-                    current.isoformat(),
-                    round(open_p, 2),
-                    round(high_p, 2),
-                    round(low_p, 2),
-                    round(close_p, 2),
-                    volume,
-                ]
-            )
-            price = close_p
-
-        current += timedelta(days=1)
-
-    return rows
+    rng = np.random.default_rng()
+
+    # Each session opens within +/-1.5 of the previous close, trades a range of
+    # 0.5-4.0 either side of the open and closes somewhere inside that range.
+    # Only the close carries over, so the closes are a cumulative sum of deltas.
+    open_delta = rng.uniform(-1.5, 1.5, days)
+    high_add = rng.uniform(0.5, 4.0, days)
+    low_sub = rng.uniform(0.5, 4.0, days)
+    close_frac = rng.uniform(0.0, 1.0, days)
+    close_p = config.start_price + np.cumsum(
+        open_delta - low_sub + close_frac * (high_add + low_sub)
+    )
+    prev_close = np.concatenate(([config.start_price], close_p[:-1]))
+    open_p = prev_close + open_delta
+    high_p = open_p + high_add
+    low_p = open_p - low_sub
+    volume = rng.integers(18_000_000, 90_000_000, days, endpoint=True)
+
+    return [
+        list(row)
+        for row in zip(
+            [config.symbol] * days,
+            _business_days(start_date, days),
+            np.round(open_p, 2).tolist(),
+            np.round(high_p, 2).tolist(),
+            np.round(low_p, 2).tolist(),
+            np.round(close_p, 2).tolist(),
+            volume.tolist(),
+        )
+    ]
+
+
+def _append_rows(path: Path, header: list[str], rows: list[list]) -> None:
+    """Append rows to a CSV, writing the header only when the file is new."""
+    new_file = not path.exists() or path.stat().st_size == 0
+    with path.open("a", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(header)
+        writer.writerows(rows)
 
 
 def extend_stocks_csv() -> None:
     path = DATA_DIR / "stocks.csv"
     path.parent.mkdir(parents=True, exist_ok=True)
 
-    existing: list[list] = []
     header = ["symbol", "date", "open", "high", "low", "close", "volume"]
-    if path.exists():
-        with path.open("r", encoding="utf-8") as f:
-            reader = list(csv.reader(f))
-            if reader:
-                header = reader[0]
-                existing = reader[1:]
 
     # Add a few extra symbols with ~30 trading days each
     configs = [
@@ -79,14 +94,7 @@ def extend_stocks_csv() -> None:
     for cfg in configs:
         generated.extend(_generate_stock_series(cfg, start_date, days=30))
 
-    with path.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(header)
-        for row in existing:
-            if row:  # skip empty lines
-                writer.writerow(row)
-        for row in generated:
-            writer.writerow(row)
+    _append_rows(path, header, generated)
 
 
 def extend_news_csv() -> None:
@@ -94,13 +102,6 @@ def extend_news_csv() -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
     header = ["date", "headline", "body", "sentiment"]
-    existing: list[list] = []
-    if path.exists():
-        with path.open("r", encoding="utf-8") as f:
-            reader = list(csv.reader(f))
-            if reader:
-                header = reader[0]
-                existing = reader[1:]
 
     templates = [
         (
@@ -145,14 +146,7 @@ def extend_news_csv() -> None:
             generated.append([date_str, headline, body, sentiment])
             day = min(day + 1, 28)
 
-    with path.open("w", encoding="utf-8", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(header)
-        for row in existing:
-            if row:
-                writer.writerow(row)
-        for row in generated:
-            writer.writerow(row)
+    _append_rows(path, header, generated)
 
 
 def extend_reports_json() -> None: